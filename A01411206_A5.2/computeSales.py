@@ -14,28 +14,193 @@ Errors are reported to the console and execution continues when possible.
 
 from __future__ import annotations
 
-import argparse
+import functools
+import inspect
 import json
+import operator
+import os
 import sys
 import time
-from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
+from itertools import compress
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from types import SimpleNamespace
+from typing import (
+    Any, Callable, Dict, Generator, Iterable, Iterator, List, NamedTuple, Optional, Tuple, TypeVar,
+    Union, cast,
+)
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
 
-@dataclass(frozen=True)
-class LineItem:
-    """A single sales line item."""
+try:
+    import ijson
+except ImportError:  # pragma: no cover - optional dependency
+    ijson = None
+
+# Line items are handed to the totals loop in lists of about this many items.
+LINE_ITEM_BATCH_SIZE = 1024
+
+# At most this many error messages are kept for the console; the rest are only counted.
+MAX_REPORTED_ERRORS = 100
+
+# Sales files larger than this are streamed (when ijson is installed) instead of loaded whole.
+STREAM_THRESHOLD_BYTES = 50_000_000
+
+
+def _ranked(*names: str) -> Dict[str, int]:
+    """Map recognised key names to their priority (0 is preferred)."""
+    return {name: rank for rank, name in enumerate(names)}
+
+
+# Recognised key names, in priority order (matched case-insensitively).
+_PRODUCT_KEYS = _ranked("product", "name", "title", "sku", "id")
+_QUANTITY_KEYS = _ranked("quantity", "qty", "count", "units")
+_CATALOGUE_PRODUCT_KEYS = _ranked("product", "name", "title", "id", "sku")
+_PRICE_KEYS = _ranked("price", "cost", "value")
+
+# Smallest chunk requested per os.read when loading a file.
+_MIN_READ_SIZE = 65536
+
+# Floats up to this magnitude convert to int without losing precision.
+_MAX_EXACT_FLOAT_INT = 2**53
+
+# Dicts with at most this many keys have their key layout cached (see _key_layout).
+_MAX_CACHED_LAYOUT_KEYS = 16
+
+_CONTAINER_KEYS = frozenset({"items", "products", "sales", "records"})
+_LINE_ITEM_KEYS = frozenset(_PRODUCT_KEYS.keys() | _QUANTITY_KEYS.keys() | _PRICE_KEYS.keys())
+_NON_MAP_KEYS = _CONTAINER_KEYS | _LINE_ITEM_KEYS
+_QUANTITY_VALUE_TYPES = (int, float, str, Decimal)
+
+# A location in the JSON structure, built as a cons-list (parent, segment) and only
+# rendered to text (see render_path) when it is reported. Segments are list indexes
+# (int), dict keys (str) or a 1-tuple holding the product of a flat-map entry.
+JsonPath = Tuple[Any, ...]
+ROOT_PATH: JsonPath = ()
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+
+class LineItem(NamedTuple):
+    """A single sales line item (a plain tuple: cheap to create in bulk)."""
 
     product: str
-    quantity: Decimal
-    path: str  # Human-readable location of the item in the JSON structure
+    quantity: Union[int, Decimal]
+    path: JsonPath  # Location of the item in the JSON structure (see render_path)
+
+
+class _ErrorLog:
+    """Error messages collected during a run, written to stderr in one go by flush_errors."""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.messages: List[str] = []
+        self.count = 0
+
+    def add(self, message: str) -> None:
+        """Record a message, keeping its text only while under the limit."""
+        self.count += 1
+        if len(self.messages) < self.limit:
+            self.messages.append(message)
+
+    def take_since(self, count: int) -> List[str]:
+        """Remove the messages recorded after the first count ones and return their kept texts."""
+        taken = self.messages[count:]
+        del self.messages[count:]
+        self.count = min(self.count, count)
+        return taken
+
+    def put_back(self, messages: List[str], count: int) -> None:
+        """Record again count messages removed by take_since, messages being their kept texts."""
+        for message in messages:
+            self.add(message)
+        self.count += count - len(messages)
+
+    def flush(self) -> None:
+        """Write the collected messages to stderr and start over."""
+        if not self.count:
+            return
+        lines = self.messages
+        if self.count > len(lines):
+            lines = lines + [f"[ERROR] ... {self.count - len(lines)} more errors not shown"]
+        sys.stderr.write("\n".join(lines) + "\n")
+        self.messages = []
+        self.count = 0
+
+
+_ERRORS = _ErrorLog(MAX_REPORTED_ERRORS)
 
 
 def _eprint(message: str) -> None:
-    """Print a message to stderr."""
-    print(message, file=sys.stderr)
+    """Queue an error message for stderr (see flush_errors)."""
+    _ERRORS.add(message)
+
+
+def flush_errors() -> None:
+    """Write the queued error messages to stderr."""
+    _ERRORS.flush()
+
+
+def _reports_errors(func: _F) -> _F:
+    """
+    Decorate a public function so the errors it queues are flushed when it returns or raises.
+
+    A generator function is flushed when the generator finishes, fails or is closed,
+    not when it is created.
+    """
+    if inspect.isgeneratorfunction(func):
+
+        @functools.wraps(func)
+        def generator_wrapper(*args: Any, **kwargs: Any) -> Any:
+            try:
+                return (yield from func(*args, **kwargs))
+            finally:
+                flush_errors()
+
+        return cast(_F, generator_wrapper)
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        try:
+            return func(*args, **kwargs)
+        finally:
+            flush_errors()
+
+    return cast(_F, wrapper)
+
+
+def render_path(path: JsonPath) -> str:
+    """Render a JsonPath in the human-readable form used in messages, e.g. $[0].items[1]."""
+    parts: List[str] = []
+    while path:
+        path, segment = path
+        if isinstance(segment, int):
+            parts.append(f"[{segment}]")
+        elif isinstance(segment, str):
+            parts.append(f".{segment}")
+        else:
+            parts.append(f"[{segment[0]!r}]")
+    return "$" + "".join(reversed(parts))
+
+
+def _find_key(keys: Iterable[Any], ranks: Dict[str, int]) -> Any:
+    """
+    Return the key among keys whose lower-cased name has the best rank, or None.
+
+    Scans the keys once instead of building a lower-cased copy of them and probing
+    it name by name. Among case variants of the same name (e.g. "Name" and "NAME")
+    the last one wins, as it did with the lower-cased copy.
+    """
+    best_key = None
+    best_rank = len(ranks)
+    for key in keys:
+        rank = ranks.get(str(key).lower())
+        if rank is not None and rank <= best_rank:
+            best_key, best_rank = key, rank
+    return best_key
 
 
 def _to_decimal(value: Any, *, context: str) -> Optional[Decimal]:
@@ -43,7 +208,13 @@ def _to_decimal(value: Any, *, context: str) -> Optional[Decimal]:
     try:
         if isinstance(value, Decimal):
             return value
-        if isinstance(value, (int, float, str)):
+        if isinstance(value, str):
+            return Decimal(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            return Decimal(value)
+        # Floats keep the str() round-trip: Decimal(str(0.1)) is 0.1, whereas
+        # Decimal(0.1) is the full binary expansion. Booleans end up invalid here.
+        if isinstance(value, (int, float)):
             return Decimal(str(value))
     except (InvalidOperation, ValueError):
         _eprint(f"[ERROR] Invalid numeric value at {context}: {value!r}")
@@ -53,14 +224,68 @@ def _to_decimal(value: Any, *, context: str) -> Optional[Decimal]:
     return None
 
 
+def _to_quantity(value: Any, *, path: JsonPath) -> Optional[Union[int, Decimal]]:
+    """
+    Convert a quantity, keeping integral values as int so totals stay in integer arithmetic.
+
+    Ints are returned as-is and integral floats such as 2.0 become ints; only
+    fractional or textual quantities go through Decimal.
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, float) and value.is_integer() and abs(value) <= _MAX_EXACT_FLOAT_INT:
+        return int(value)
+    return _to_decimal(value, context=render_path(path))
+
+
+def _to_cents(price: Decimal) -> Union[int, Decimal]:
+    """Express a price in cents: an exact int when possible, otherwise a Decimal."""
+    if not price.is_finite():
+        # Left as is: scaleb would raise on sNaN, and a product that is never sold
+        # must not stop the run.
+        return price
+    cents = price.scaleb(2)
+    if cents == cents.to_integral_value():
+        return int(cents)
+    return cents
+
+
+def _read_bytes(path: Path) -> bytes:
+    """Read a whole file with raw os-level calls (no buffered or text layers)."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # st_size is only a hint: pipes, FIFOs and procfs files report 0, and a
+        # single read may return less than asked. Read until end of file.
+        chunk_size = max(os.fstat(fd).st_size, _MIN_READ_SIZE)
+        chunks: List[bytes] = []
+        while True:
+            chunk = os.read(fd, chunk_size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+@_reports_errors
 def load_json(path: Path) -> Any:
     """Load JSON from a file. On error, report and return an empty structure."""
     try:
+        if orjson is not None:
+            # Raw bytes handed straight to the native parser, which decodes UTF-8 itself.
+            data = _read_bytes(path)
+            try:
+                return orjson.loads(data)  # pylint: disable=no-member
+            except orjson.JSONDecodeError:  # pylint: disable=no-member
+                # orjson rejects some input the json module accepts (NaN, Infinity,
+                # numbers beyond float range): let json decide, with its usual messages.
+                return json.loads(data.decode("utf-8"))
         with path.open("r", encoding="utf-8") as handle:
             return json.load(handle)
     except FileNotFoundError:
         _eprint(f"[ERROR] File not found: {path}")
-    except json.JSONDecodeError as exc:
+    except json.JSONDecodeError as exc:  # orjson.JSONDecodeError is a subclass
         _eprint(f"[ERROR] Invalid JSON in file {path}: {exc}")
     except OSError as exc:
         _eprint(f"[ERROR] Could not read file {path}: {exc}")
@@ -69,6 +294,22 @@ def load_json(path: Path) -> Any:
     return {}
 
 
+def should_stream(path: Path) -> bool:
+    """Return True if a sales file is large enough to stream and is a top-level JSON array."""
+    if ijson is None:
+        return False
+    try:
+        if path.stat().st_size <= STREAM_THRESHOLD_BYTES:
+            return False
+        with path.open("rb") as handle:
+            head = handle.read(4096).lstrip()
+    except OSError:
+        # Let load_json report the problem.
+        return False
+    return head.startswith(b"[")
+
+
+@_reports_errors
 def parse_price_catalogue(data: Any) -> Dict[str, Decimal]:
     """
     Parse a catalogue of prices.
@@ -97,15 +338,8 @@ def parse_price_catalogue(data: Any) -> Dict[str, Decimal]:
                 _eprint(f"[ERROR] Catalogue entry at index {idx} is not an object: {item!r}")
                 continue
 
-            lower_keys = {str(k).lower(): k for k in item.keys()}
-            product_key = (
-                lower_keys.get("product")
-                or lower_keys.get("name")
-                or lower_keys.get("title")
-                or lower_keys.get("id")
-                or lower_keys.get("sku")
-            )
-            price_key = lower_keys.get("price") or lower_keys.get("cost") or lower_keys.get("value")
+            product_key = _find_key(item, _CATALOGUE_PRODUCT_KEYS)
+            price_key = _find_key(item, _PRICE_KEYS)
 
             if product_key is None or price_key is None:
                 _eprint(f"[ERROR] Catalogue entry missing product/price at index {idx}: {item!r}")
@@ -128,113 +362,280 @@ def parse_price_catalogue(data: Any) -> Dict[str, Decimal]:
     return prices
 
 
-def _looks_like_product_quantity_map(data: dict) -> bool:
+class _KeyLayout(NamedTuple):
+    """What the keys of a dict say about it (see _key_layout)."""
+
+    may_be_map: bool  # Only plain string keys that are not container/line-item names
+    product_key: Any  # Key holding the product of a line item, or None
+    quantity_key: Any  # Key holding the quantity of a line item, or None
+
+
+def _key_layout(obj: dict) -> _KeyLayout:
     """
-    Heuristic: a dict that maps product-name -> quantity.
+    Analyse a dict's keys, once per distinct layout for the usual small objects.
 
-    Important: avoid misclassifying line-item objects such as
-    {"product": "...", "quantity": ...}.
+    Sales files repeat a handful of object shapes (a sale, a customer, a line item),
+    so their key checks are done the first time a layout is seen and then looked up.
+    Larger dicts, such as a flat product map, are one of a kind: they are analysed
+    directly rather than copied into the cache.
     """
-    if not data:
-        return False
+    if len(obj) <= _MAX_CACHED_LAYOUT_KEYS:
+        return _cached_key_layout(tuple(obj))
+    return _analyse_keys(obj)
 
-    lower_keys = {str(k).lower() for k in data.keys()}
 
-    # If it contains typical container keys, it's not a flat map.
-    if lower_keys.intersection({"items", "products", "sales", "records"}):
-        return False
+@functools.lru_cache(maxsize=1024)
+def _cached_key_layout(keys: Tuple[Any, ...]) -> _KeyLayout:
+    """_analyse_keys, remembered per tuple of keys."""
+    return _analyse_keys(keys)
 
-    # If it contains typical line-item keys, it's not a flat map.
-    if lower_keys.intersection(
-        {
-            "product",
-            "name",
-            "title",
-            "sku",
-            "id",
-            "quantity",
-            "qty",
-            "count",
-            "units",
-            "price",
-            "cost",
-            "value",
-        }
-    ):
-        return False
 
-    return all(isinstance(k, str) for k in data.keys()) and all(
-        isinstance(v, (int, float, str, Decimal)) for v in data.values()
-    )
+def _analyse_keys(keys: Iterable[Any]) -> _KeyLayout:
+    """Compute the _KeyLayout of a dict from its keys."""
+    may_be_map = all(isinstance(key, str) and key.lower() not in _NON_MAP_KEYS for key in keys)
+    return _KeyLayout(may_be_map, _find_key(keys, _PRODUCT_KEYS), _find_key(keys, _QUANTITY_KEYS))
 
 
-def _extract_line_item(obj: dict, path: str) -> Optional[LineItem]:
+def _looks_like_product_quantity_map(data: dict, layout: _KeyLayout) -> bool:
+    """
+    Heuristic: a dict that maps product-name -> quantity.
+
+    Important: avoid misclassifying line-item objects such as
+    {"product": "...", "quantity": ...}: typical container or line-item keys
+    (e.g. "items", "product") rule a dict out, as does any non-numeric value.
+    """
+    if not data or not layout.may_be_map:
+        return False
+    return all(isinstance(value, _QUANTITY_VALUE_TYPES) for value in data.values())
+
+
+def _extract_line_item(obj: dict, path: JsonPath, layout: _KeyLayout) -> Optional[LineItem]:
     """Try to extract a LineItem from a dict object."""
-    key_map = {str(k).lower(): k for k in obj.keys()}
-    product_key = (
-        key_map.get("product")
-        or key_map.get("name")
-        or key_map.get("title")
-        or key_map.get("sku")
-        or key_map.get("id")
-    )
-    quantity_key = key_map.get("quantity") or key_map.get("qty") or key_map.get("count") or key_map.get("units")
+    product_key = layout.product_key
+    quantity_key = layout.quantity_key
 
     if product_key is None or quantity_key is None:
         return None
 
     product_value = obj[product_key]
     if not isinstance(product_value, str):
-        _eprint(f"[ERROR] Invalid product value at {path}.{product_key}: {product_value!r}")
+        product_path = render_path((path, product_key))
+        _eprint(f"[ERROR] Invalid product value at {product_path}: {product_value!r}")
         return None
 
-    quantity = _to_decimal(obj[quantity_key], context=f"{path}.{quantity_key}")
+    quantity_path = (path, quantity_key)
+    quantity = _to_quantity(obj[quantity_key], path=quantity_path)
     if quantity is None:
         return None
 
     if quantity <= 0:
-        _eprint(f"[ERROR] Quantity must be > 0 at {path}.{quantity_key}: {quantity}")
+        _eprint(f"[ERROR] Quantity must be > 0 at {render_path(quantity_path)}: {quantity}")
         return None
 
     return LineItem(product=product_value, quantity=quantity, path=path)
 
 
-def iter_line_items(data: Any, *, path: str = "$") -> Iterator[LineItem]:
+def _take_plain_line_items(
+    items: list, path: JsonPath, start: int, out: List[LineItem], limit: int
+) -> int:
+    """
+    Append the run of plain line items of a list starting at start to out.
+
+    A plain line item is a dict whose product key (resolved exactly as the generic
+    walk does) holds a str, whose quantity key holds a positive int, and whose values
+    are all scalars: the generic walk would produce the same LineItem and find nothing
+    nested in it. Stops at the first other element or once out holds limit items,
+    and returns the index to resume from.
+
+    This is a straight loop on purpose: it is the part of the walk that PyPy's
+    tracing JIT compiles best.
+    """
+    idx = start
+    end = len(items)
+    while idx < end:
+        obj = items[idx]
+        if not isinstance(obj, dict):
+            break
+        layout = _key_layout(obj)
+        if layout.product_key is None or layout.quantity_key is None:
+            break
+        product = obj[layout.product_key]
+        quantity = obj[layout.quantity_key]
+        if not isinstance(product, str) or isinstance(quantity, bool):
+            break
+        if not isinstance(quantity, int) or quantity <= 0:
+            break
+        if any(isinstance(value, (dict, list)) for value in obj.values()):
+            break
+        out.append(LineItem(product, quantity, (path, idx)))
+        idx += 1
+        if len(out) >= limit:
+            break
+    return idx
+
+
+def _plain_line_item_batches(
+    items: list, path: JsonPath, batch: List[LineItem], batch_size: int
+) -> Generator[List[LineItem], None, Tuple[int, List[LineItem]]]:
+    """
+    Fast lane for a list of plain line items (see _take_plain_line_items).
+
+    Yields each batch that fills up, and returns the index of the first element
+    needing the generic walk together with the batch being filled.
+    """
+    idx = 0
+    while True:
+        idx = _take_plain_line_items(items, path, idx, batch, batch_size)
+        if len(batch) < batch_size:
+            return idx, batch
+        yield batch
+        batch = []
+
+
+def _yield_ahead_of_errors(
+    batch: List[LineItem], errors_before: int
+) -> Generator[List[LineItem], None, List[LineItem]]:
+    """
+    Yield the pending batch ahead of the errors queued since errors_before.
+
+    The consumer reports its own errors (such as unknown products) for the items
+    it is handed, so the items found before an invalid entry go out first and
+    the messages stay in document order. Returns the batch to carry on with.
+    """
+    if not batch:
+        return batch
+    count = _ERRORS.count - errors_before
+    held = _ERRORS.take_since(errors_before)
+    try:
+        yield batch
+    finally:
+        _ERRORS.put_back(held, count)
+    return []
+
+
+def _map_line_item_batches(
+    data: dict, path: JsonPath, batch: List[LineItem]
+) -> Generator[List[LineItem], None, List[LineItem]]:
+    """Append the line items of a flat {"product": quantity} mapping to batch, and return it."""
+    for product, qty in data.items():
+        item_path = (path, (product,))
+        errors_before = _ERRORS.count
+        quantity = _to_quantity(qty, path=item_path)
+        if quantity is not None and quantity <= 0:
+            _eprint(f"[ERROR] Quantity must be > 0 at {render_path(item_path)}: {quantity}")
+            quantity = None
+        if quantity is None:
+            batch = yield from _yield_ahead_of_errors(batch, errors_before)
+            continue
+        batch.append(LineItem(product=product, quantity=quantity, path=item_path))
+    return batch
+
+
+def iter_line_items(data: Any, *, path: JsonPath = ROOT_PATH) -> Iterator[LineItem]:
     """
     Iterate over all line items inside an arbitrary JSON structure.
 
     This function is intentionally tolerant: it searches for objects that look like
     {"product": "...", "quantity": ...} in nested lists/dicts, and also supports
     a flat mapping like {"productA": 2, "productB": 1}.
+
+    Invalid entries are reported as errors once the iteration finishes (or is
+    abandoned), as with iter_line_item_batches.
     """
-    if isinstance(data, list):
-        for idx, value in enumerate(data):
-            yield from iter_line_items(value, path=f"{path}[{idx}]")
-        return
+    for batch in iter_line_item_batches(data, path=path):
+        yield from batch
 
-    if isinstance(data, dict):
-        if _looks_like_product_quantity_map(data):
-            for product, qty in data.items():
-                quantity = _to_decimal(qty, context=f"{path}[{product!r}]")
-                if quantity is None:
-                    continue
-                if quantity <= 0:
-                    _eprint(f"[ERROR] Quantity must be > 0 at {path}[{product!r}]: {quantity}")
-                    continue
-                yield LineItem(product=product, quantity=quantity, path=f"{path}[{product!r}]")
-            return
 
-        maybe_item = _extract_line_item(data, path)
-        if maybe_item is not None:
-            yield maybe_item
-            # Do not return: sometimes line item objects contain extra nested structures.
-            # We'll keep scanning for any nested items.
-        for key, value in data.items():
-            key_str = str(key)
-            yield from iter_line_items(value, path=f"{path}.{key_str}")
-        return
+@_reports_errors
+def iter_line_item_batches(
+    data: Any, *, path: JsonPath = ROOT_PATH, batch_size: int = LINE_ITEM_BATCH_SIZE
+) -> Iterator[List[LineItem]]:
+    """
+    Like iter_line_items, but yield the items in lists of about batch_size.
 
-    # Scalars are ignored.
+    Consumers iterate each list directly, so the traversal is suspended and
+    resumed once per batch instead of once per item. Errors are queued and
+    written out when the generator finishes or is closed.
+    """
+    yield from _walk_line_item_batches(((data, path),), batch_size)
+
+
+def _walk_line_item_batches(
+    roots: Iterable[Tuple[Any, JsonPath]], batch_size: int
+) -> Generator[List[LineItem], None, None]:
+    """Search each (node, path) of roots in turn, filling the batches across all of them."""
+    batch: List[LineItem] = []
+    for root in roots:
+        # Depth-first walk with an explicit stack (children pushed in reverse so they
+        # are visited in document order) instead of one nested generator per node.
+        stack: List[Tuple[Any, JsonPath]] = [root]
+        while stack:
+            node, node_path = stack.pop()
+
+            if isinstance(node, list):
+                # Fast lane for the usual shape, a list of plain line items. The first
+                # element needing the generic walk (nested data, invalid values to
+                # report) ends it; the rest of the list goes on the stack.
+                idx, batch = yield from _plain_line_item_batches(node, node_path, batch, batch_size)
+                stack.extend((node[i], (node_path, i)) for i in range(len(node) - 1, idx - 1, -1))
+                continue
+
+            if isinstance(node, dict):
+                layout = _key_layout(node)
+                if _looks_like_product_quantity_map(node, layout):
+                    batch = yield from _map_line_item_batches(node, node_path, batch)
+                else:
+                    errors_before = _ERRORS.count
+                    maybe_item = _extract_line_item(node, node_path, layout)
+                    if maybe_item is not None:
+                        batch.append(maybe_item)
+                        # Do not stop here: sometimes line item objects contain extra
+                        # nested structures. We'll keep scanning for any nested items.
+                    elif _ERRORS.count != errors_before:
+                        batch = yield from _yield_ahead_of_errors(batch, errors_before)
+                    stack.extend(
+                        (value, (node_path, str(key))) for key, value in reversed(node.items())
+                    )
+
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+            # Scalars are ignored.
+
+    if batch:
+        yield batch
+
+
+@_reports_errors
+def iter_streamed_line_item_batches(path: Path) -> Iterator[List[LineItem]]:
+    """
+    Iterate over batches of line items of a sales file whose top level is a JSON array.
+
+    Requires ijson. Array elements are parsed and searched one at a time, so memory
+    stays bounded by the largest single sale instead of the whole file. Items are
+    reported exactly as iter_line_items would on the fully loaded structure. Errors
+    are queued and written out as in iter_line_item_batches.
+
+    A file that turns out to be invalid JSON (or unreadable) part way through is
+    treated as load_json treats it: the errors queued for it so far are dropped,
+    the problem is reported, and the exception (ijson.JSONError or OSError) is
+    raised again so the caller can discard the items already yielded.
+    """
+    errors_before = _ERRORS.count
+    try:
+        with path.open("rb") as handle:
+            elements = ijson.items(handle, "item")
+            roots = ((element, (ROOT_PATH, idx)) for idx, element in enumerate(elements))
+            yield from _walk_line_item_batches(roots, LINE_ITEM_BATCH_SIZE)
+    except ijson.JSONError as exc:
+        _ERRORS.take_since(errors_before)
+        _eprint(f"[ERROR] Invalid JSON in file {path}: {exc}")
+        raise
+    except OSError as exc:
+        _ERRORS.take_since(errors_before)
+        _eprint(f"[ERROR] Could not read file {path}: {exc}")
+        raise
 
 
 def compute_total(prices: Dict[str, Decimal], sales_data: Any) -> Tuple[Decimal, int, int]:
@@ -244,20 +645,54 @@ def compute_total(prices: Dict[str, Decimal], sales_data: Any) -> Tuple[Decimal,
     Returns:
         (total_cost, processed_items, skipped_items)
     """
-    total = Decimal("0")
+    return sum_line_item_batches(prices, iter_line_item_batches(sales_data))
+
+
+@_reports_errors
+def sum_line_item_batches(
+    prices: Dict[str, Decimal], batches: Iterable[List[LineItem]]
+) -> Tuple[Decimal, int, int]:
+    """
+    Compute total cost for batches of line items.
+
+    Quantities are first folded per product during the traversal; the prices
+    are then applied once per distinct product, in cents, as plain ints while
+    every price and quantity involved is integral. Only the final sum is
+    converted back to Decimal.
+
+    Returns:
+        (total_cost, processed_items, skipped_items)
+    """
+    # Products are interned to small integer ids so the loop does a single hash
+    # probe per item and then indexes plain lists.
+    product_ids = {product: pid for pid, product in enumerate(prices)}
+    prices_cents = [_to_cents(price) for price in prices.values()]
+    quantities: List[Union[int, Decimal]] = [0] * len(prices_cents)
     processed = 0
     skipped = 0
 
-    for item in iter_line_items(sales_data):
-        processed += 1
-        if item.product not in prices:
-            skipped += 1
-            _eprint(f"[ERROR] Unknown product at {item.path}: {item.product!r}")
-            continue
+    # Bound once: the loop body then only touches local names, and unpacking the
+    # LineItem tuple avoids three attribute lookups per item.
+    get_id = product_ids.get
+    report_error = _eprint
+    for batch in batches:
+        processed += len(batch)
+        for product, quantity, item_path in batch:
+            pid = get_id(product, -1)
+            if pid < 0:
+                skipped += 1
+                report_error(f"[ERROR] Unknown product at {render_path(item_path)}: {product!r}")
+                continue
 
-        total += prices[item.product] * item.quantity
+            quantities[pid] += quantity
 
-    return total, processed, skipped
+    # Multiply-add runs inside map/sum, without a Python-level loop body. Only
+    # products actually sold (non-zero folded quantity) take part, so an unused
+    # catalogue entry such as "Infinity" or "NaN" cannot affect the total.
+    total_cents = sum(
+        map(operator.mul, compress(prices_cents, quantities), compress(quantities, quantities))
+    )
+    return Decimal(total_cents).scaleb(-2), processed, skipped
 
 
 def format_money(value: Decimal) -> str:
@@ -297,6 +732,7 @@ def build_report(
     return "\n".join(lines)
 
 
+@_reports_errors
 def write_results(report: str, output_path: Path) -> None:
     """Write report to output file."""
     try:
@@ -305,12 +741,24 @@ def write_results(report: str, output_path: Path) -> None:
         _eprint(f"[ERROR] Could not write results file {output_path}: {exc}")
 
 
-def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
-    """Parse CLI arguments."""
+def parse_args(argv: Optional[List[str]] = None) -> SimpleNamespace:
+    """
+    Parse CLI arguments.
+
+    The usual call, exactly two file paths, is unpacked directly; argparse is only
+    imported to handle anything else (--help, usage errors).
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    if len(argv) == 2 and not any(arg.startswith("-") for arg in argv):
+        return SimpleNamespace(price_catalogue=argv[0], sales_record=argv[1])
+
+    import argparse  # pylint: disable=import-outside-toplevel
+
     parser = argparse.ArgumentParser(description="Compute total cost of sales from JSON files.")
     parser.add_argument("price_catalogue", help="Path to priceCatalogue.json")
     parser.add_argument("sales_record", help="Path to salesRecord.json")
-    return parser.parse_args(argv)
+    return SimpleNamespace(**vars(parser.parse_args(argv)))
 
 
 def main(argv: Optional[List[str]] = None) -> int:
@@ -321,28 +769,42 @@ def main(argv: Optional[List[str]] = None) -> int:
 
     start = time.perf_counter()
 
-    price_data = load_json(price_path)
-    sales_data = load_json(sales_path)
-
-    prices = parse_price_catalogue(price_data)
-    if not prices:
-        _eprint("[ERROR] Price catalogue is empty or invalid. Totals may be zero.")
-
-    total, processed, skipped = compute_total(prices, sales_data)
-
-    elapsed = time.perf_counter() - start
-
-    report = build_report(
-        price_file=price_path,
-        sales_file=sales_path,
-        total_cost=total,
-        processed_items=processed,
-        skipped_items=skipped,
-        elapsed_seconds=elapsed,
-    )
-
-    print(report)
-    write_results(report, Path("SalesResults.txt"))
+    try:
+        price_data = load_json(price_path)
+        streaming = should_stream(sales_path)
+        sales_data = None if streaming else load_json(sales_path)
+
+        prices = parse_price_catalogue(price_data)
+        if not prices:
+            _eprint("[ERROR] Price catalogue is empty or invalid. Totals may be zero.")
+
+        if streaming:
+            try:
+                total, processed, skipped = sum_line_item_batches(
+                    prices, iter_streamed_line_item_batches(sales_path)
+                )
+            except (ijson.JSONError, OSError):
+                # Already reported. As with load_json, nothing from a broken file counts.
+                total, processed, skipped = Decimal(0), 0, 0
+        else:
+            total, processed, skipped = compute_total(prices, sales_data)
+
+        elapsed = time.perf_counter() - start
+
+        report = build_report(
+            price_file=price_path,
+            sales_file=sales_path,
+            total_cost=total,
+            processed_items=processed,
+            skipped_items=skipped,
+            elapsed_seconds=elapsed,
+        )
+
+        print(report)
+        write_results(report, Path("SalesResults.txt"))
+    finally:
+        # Whatever happens, do not lose the errors queued so far.
+        flush_errors()
 
     return 0
 
@@ -1,7 +1,12 @@
+import contextlib
+import io
 import json
+import os
+import tempfile
 import unittest
 from decimal import Decimal
 from pathlib import Path
+from unittest import mock
 
 import computeSales
 
@@ -20,6 +25,52 @@ class TestComputeSales(unittest.TestCase):
         self.assertEqual(items[0].product, "a")
         self.assertEqual(items[0].quantity, Decimal("2"))
 
+    def test_iter_line_items_matches_keys_case_insensitively_by_priority(self):
+        data = [{"Name": "b", "PRODUCT": "a", "Qty": 3}]
+        items = list(computeSales.iter_line_items(data))
+        self.assertEqual([(i.product, i.quantity) for i in items], [("a", 3)])
+
+    def test_iter_line_items_last_case_variant_key_wins(self):
+        data = {"x": {"Name": "x", "NAME": "a", "qty": 1}}
+        total, processed, skipped = computeSales.compute_total({"a": Decimal("1"), "x": Decimal("100")}, data)
+        self.assertEqual((total, processed, skipped), (Decimal("1.00"), 1, 0))
+
+    def test_iter_line_items_plain_list_follows_case_variant_rule(self):
+        data = [{"product": "x", "PRODUCT": "a", "quantity": 1}, {"product": "b", "quantity": 2, "Quantity": 3}]
+        items = list(computeSales.iter_line_items(data))
+        self.assertEqual([(i.product, i.quantity) for i in items], [("a", 1), ("b", 3)])
+
+    def test_iter_line_items_keeps_integral_quantities_as_int(self):
+        data = [{"product": "a", "quantity": 2.0}, {"product": "b", "quantity": 1.5}]
+        items = list(computeSales.iter_line_items(data))
+        self.assertIs(type(items[0].quantity), int)
+        self.assertEqual(items[0].quantity, 2)
+        self.assertEqual(items[1].quantity, Decimal("1.5"))
+
+    def test_iter_line_items_handles_deep_nesting(self):
+        data = {"product": "a", "quantity": 1}
+        for _ in range(5000):
+            data = [data]
+        items = list(computeSales.iter_line_items(data))
+        self.assertEqual([i.product for i in items], ["a"])
+
+    def test_large_product_maps_bypass_the_key_layout_cache(self):
+        computeSales._cached_key_layout.cache_clear()
+        data = [{f"p{n}": 1 for n in range(100)}, {"product": "a", "quantity": 1}]
+        self.assertEqual(len(list(computeSales.iter_line_items(data))), 101)
+        self.assertEqual(computeSales._cached_key_layout.cache_info().currsize, 1)
+
+    def test_iter_line_item_batches_splits_items(self):
+        data = [{"product": "a", "quantity": n} for n in range(1, 6)]
+        batches = list(computeSales.iter_line_item_batches(data, batch_size=2))
+        self.assertEqual([len(b) for b in batches], [2, 2, 1])
+        self.assertEqual([i.quantity for b in batches for i in b], [1, 2, 3, 4, 5])
+
+    def test_line_item_paths_render_like_json_locations(self):
+        data = [{"sale": {"items": [{"product": "a", "quantity": 2}]}}, {"b": 1}]
+        paths = [computeSales.render_path(i.path) for i in computeSales.iter_line_items(data)]
+        self.assertEqual(paths, ["$[0].sale.items[0]", "$[1]['b']"])
+
     def test_iter_line_items_supports_map(self):
         data = {"a": 2, "b": 1}
         items = list(computeSales.iter_line_items(data))
@@ -32,16 +83,92 @@ class TestComputeSales(unittest.TestCase):
         self.assertEqual(skipped, 1)
         self.assertEqual(total, Decimal("20.00"))
 
+    def test_compute_total_keeps_fractional_amounts_exact(self):
+        prices = {"a": Decimal("0.125"), "b": Decimal("2.50")}
+        data = [{"product": "a", "quantity": 3}, {"product": "b", "quantity": "1.5"}]
+        total, processed, skipped = computeSales.compute_total(prices, data)
+        self.assertEqual((processed, skipped), (2, 0))
+        self.assertEqual(total, Decimal("4.125"))
+
+    def test_compute_total_ignores_unsold_non_finite_prices(self):
+        for bad_price in ("Infinity", "NaN", "sNaN"):
+            prices = computeSales.parse_price_catalogue({"a": bad_price, "b": 2})
+            total, processed, skipped = computeSales.compute_total(prices, [{"product": "b", "quantity": 1}])
+            self.assertEqual((total, processed, skipped), (Decimal("2.00"), 1, 0))
+
+    def test_compute_total_writes_its_errors(self):
+        data = [{"product": "missing", "quantity": 1}, {"product": "a", "quantity": "x"}, {"gone": 1, "a": 0}]
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            computeSales.compute_total(self.prices, data)
+        self.assertEqual(
+            err.getvalue().splitlines(),
+            [
+                "[ERROR] Unknown product at $[0]: 'missing'",
+                "[ERROR] Invalid numeric value at $[1].quantity: 'x'",
+                "[ERROR] Unknown product at $[2]['gone']: 'gone'",
+                "[ERROR] Quantity must be > 0 at $[2]['a']: 0",
+            ],
+        )
+
+    def test_iter_line_items_writes_its_errors_when_done(self):
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            items = list(computeSales.iter_line_items([{"product": "a", "quantity": "x"}]))
+            self.assertEqual(err.getvalue().splitlines(), ["[ERROR] Invalid numeric value at $[0].quantity: 'x'"])
+            computeSales.parse_price_catalogue({"a": 1})
+        self.assertEqual(items, [])
+        self.assertEqual(len(err.getvalue().splitlines()), 1)
+
     def test_parse_price_catalogue_dict(self):
         data = {"a": 10, "b": "2.5"}
         prices = computeSales.parse_price_catalogue(data)
         self.assertEqual(prices["a"], Decimal("10"))
         self.assertEqual(prices["b"], Decimal("2.5"))
 
+    def test_parse_price_catalogue_list_rejects_invalid_prices(self):
+        data = [
+            {"product": "a", "price": 0.1},
+            {"product": "b", "price": True},
+            {"product": "c", "price": "x"},
+        ]
+        prices = computeSales.parse_price_catalogue(data)
+        self.assertEqual(prices, {"a": Decimal("0.1")})
+
+    def test_error_log_caps_reported_messages(self):
+        log = computeSales._ErrorLog(limit=2)
+        for n in range(5):
+            log.add(f"e{n}")
+        with contextlib.redirect_stderr(io.StringIO()) as err:
+            log.flush()
+        self.assertEqual(err.getvalue().splitlines(), ["e0", "e1", "[ERROR] ... 3 more errors not shown"])
+
+    @unittest.skipUnless(os.path.isdir("/dev/fd"), "needs /dev/fd")
+    def test_load_json_reads_from_pipe(self):
+        read_fd, write_fd = os.pipe()
+        try:
+            os.write(write_fd, b'{"a": 2}')
+            os.close(write_fd)
+            self.assertEqual(computeSales.load_json(Path(f"/dev/fd/{read_fd}")), {"a": 2})
+        finally:
+            os.close(read_fd)
+
+    def test_load_json_accepts_non_finite_literals(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "prices.json"
+            path.write_text('{"a": Infinity, "b": 2}', encoding="utf-8")
+            self.assertEqual(computeSales.load_json(path), {"a": float("inf"), "b": 2})
+
     def test_load_json_missing_returns_empty(self):
         missing = computeSales.load_json(Path("does_not_exist.json"))
         self.assertEqual(missing, {})
 
+    def test_parse_args_positional_paths(self):
+        args = computeSales.parse_args(["prices.json", "sales.json"])
+        self.assertEqual((args.price_catalogue, args.sales_record), ("prices.json", "sales.json"))
+
+    def test_parse_args_rejects_wrong_arity(self):
+        with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+            computeSales.parse_args(["prices.json"])
+
     def test_end_to_end_example_files(self):
         root = Path(__file__).resolve().parent.parent
         price_path = root / "data" / "priceCatalogue.json"
@@ -60,6 +187,43 @@ class TestComputeSales(unittest.TestCase):
         self.assertEqual(processed, 5)
         self.assertEqual(skipped, 1)
 
+    @unittest.skipIf(computeSales.ijson is None, "ijson is not installed")
+    def test_streamed_items_match_loaded_items(self):
+        sales_path = Path(__file__).resolve().parent.parent / "data" / "salesRecord.json"
+        streamed = [item for batch in computeSales.iter_streamed_line_item_batches(sales_path) for item in batch]
+        loaded = list(computeSales.iter_line_items(json.loads(sales_path.read_text(encoding="utf-8"))))
+        self.assertEqual(streamed, loaded)
+
+    @unittest.skipIf(computeSales.ijson is None, "ijson is not installed")
+    def test_main_streaming_matches_loaded_run(self):
+        data_dir = Path(__file__).resolve().parent.parent / "data"
+        sales_text = (data_dir / "salesRecord.json").read_text(encoding="utf-8")
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)  # main writes SalesResults.txt to the current directory
+            try:
+                Path("prices.json").write_bytes((data_dir / "priceCatalogue.json").read_bytes())
+                # The full example, and one cut off after the third sale: invalid JSON, so nothing counts.
+                truncated = sales_text[: sales_text.index('"sale_id": 4')]
+                for sales, total in ((sales_text, "81.75"), (truncated, "0.00")):
+                    Path("sales.json").write_text(sales, encoding="utf-8")
+                    runs = [self._run_main(threshold) for threshold in (computeSales.STREAM_THRESHOLD_BYTES, 0)]
+                    self.assertEqual(runs[1], runs[0])
+                    self.assertIn(f"TOTAL COST: {total}", runs[0][0])
+            finally:
+                os.chdir(cwd)
+
+    def _run_main(self, stream_threshold):
+        with mock.patch.object(computeSales, "STREAM_THRESHOLD_BYTES", stream_threshold):
+            self.assertEqual(computeSales.should_stream(Path("sales.json")), stream_threshold == 0)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                with contextlib.redirect_stderr(io.StringIO()) as err:
+                    computeSales.main(["prices.json", "sales.json"])
+        lines = [line for line in out.getvalue().splitlines() if not line.startswith("Time elapsed")]
+        # The parsers word "Invalid JSON" differently: compare up to their own message.
+        errors = [e.partition(": ")[0] for e in err.getvalue().splitlines() if e.startswith("[ERROR]")]
+        return lines, errors
+
 
 if __name__ == "__main__":
     unittest.main()